@@ -24,8 +24,8 @@ def main():
     ]
 
     # Add any hidden imports that PyInstaller might miss
-    # pytz is often a tricky one for PyInstaller
-    pyinstaller_args.extend(['--hidden-import=pytz.zoneinfo'])
+    # zoneinfo reads the tz database from the tzdata package where the OS has none (e.g. Windows)
+    pyinstaller_args.extend(['--collect-data=tzdata'])
 
     # Add platform-specific arguments
     if platform.system() == 'Windows' and ICON_WINDOWS:
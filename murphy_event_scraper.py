@@ -1,102 +1,313 @@
 import requests
-from bs4 import BeautifulSoup
-from ics import Calendar, Event
+import lxml.html
+from lxml import etree
 import dateutil.parser
 import re
 import os
-import pytz
+import json
+import logging
+import sys
+import time
+import hashlib
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+# Number of pages fetched in parallel; kept within the session's pool size
+# so worker threads never wait on a free connection.
+MAX_WORKERS = 8
+
+# Share one session so every page fetch reuses the same pooled connection
+# to murphy.tulane.edu instead of doing a fresh TCP/TLS handshake.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=3))
+SESSION.headers.update({
+    'User-Agent': 'MurphyEventScraper/1.0',
+    # Every compression urllib3 can decode here (gzip, deflate, and br when
+    # brotli is installed); bodies are decompressed transparently.
+    'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
+})
+
+# Remembers each page's ETag/Last-Modified and HTML between runs, so unchanged
+# pages come back as an empty 304 response instead of being downloaded again.
+PAGE_CACHE_FILE = 'page_cache.json'
+
+# Pages fetched less than this many seconds ago are reused without any request,
+# unless the server's Cache-Control header says otherwise
+PAGE_CACHE_TTL = 3600
+
+_CACHE_CONTROL_MAX_AGE = re.compile(r'\bmax-age\s*=\s*"?(\d+)')
+
+# Define the timezone for the events, as the source HTML is misleading.
+# Use 'America/Chicago' for Central Time Zone.
+CENTRAL_TZ = ZoneInfo("America/Chicago")
+
+# Directory the generated .ics files are written to
+EVENTS_DIR = 'events'
+
+# Patterns used to turn an event title into a valid filename
+_FILENAME_STRIP = re.compile(r'[^\w\s-]')
+_FILENAME_DASH = re.compile(r'[-\s]+')
+
+
+def _has_class(name):
+    """Returns an XPath predicate matching elements that have the given CSS class."""
+    # @class can hold several space-separated classes, so match whole words
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath expressions for the event listing, compiled once and reused for every
+# page and event
+_XP_EVENT_CONTAINERS = etree.XPath(f"//div[{_has_class('views-field-title')}]")
+_XP_FIRST_LINK = etree.XPath("(.//a)[1]")
+_XP_TITLE_SPAN = etree.XPath(f"(.//span[{_has_class('font-bold')}])[1]")
+_XP_DATETIME = etree.XPath("string((.//time)[1]/@datetime)")
+_XP_LOCATION = etree.XPath(f"(.//span[{_has_class('location')}])[1]")
+_XP_PAGER_LINKS = etree.XPath(f"//li[{_has_class('pager__item')}]//a[starts-with(@href, '?page=')]")
+
+# Format used for UTC date-times in the generated calendars
+_ICS_DATETIME = '%Y%m%dT%H%M%SZ'
+
+# DTSTAMP changes on every run, so it is ignored when checking whether an
+# existing calendar file is already up to date
+_ICS_DTSTAMP_LINE = re.compile(rb'^DTSTAMP:[^\r\n]*\r\n', re.MULTILINE)
+
+
+def _escape_ics_text(value):
+    """Escapes a value for use in an iCalendar TEXT property."""
+    return (value.replace('\\', '\\\\')
+                 .replace(';', '\\;')
+                 .replace(',', '\\,')
+                 .replace('\r\n', '\\n')
+                 .replace('\n', '\\n'))
+
+
+def _fold_ics_line(line):
+    """Folds a content line into chunks of at most 75 octets, as iCalendar requires."""
+    if len(line.encode('utf-8')) <= 75:
+        return line
+
+    chunks = []
+    chunk = ''
+    size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            chunks.append(chunk)
+            chunk = ''
+            size = 0
+            limit = 74 # Continuation lines start with a space
+        chunk += char
+        size += char_size
+    chunks.append(chunk)
+    return '\r\n '.join(chunks)
+
 
 def generate_ics_file(event_details):
-    """Creates an .ics file for a single event."""
-    c = Calendar()
-    e = Event()
+    """Creates an .ics file for a single event.
+
+    Returns 'written', 'unchanged' if an identical file already exists,
+    or 'failed' if the file could not be written.
+    """
+    title = event_details['title']
+    begin = event_details['datetime']
+
+    # A stable UID lets calendar apps update an imported event instead of duplicating it
+    uid = hashlib.sha1(f"{title}|{begin.isoformat()}".encode('utf-8')).hexdigest()
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//MurphyEventScraper//EN',
+        'BEGIN:VEVENT',
+        f'UID:{uid}@murphy.tulane.edu',
+        f'DTSTAMP:{datetime.now(timezone.utc).strftime(_ICS_DATETIME)}',
+        f'DTSTART:{begin.astimezone(timezone.utc).strftime(_ICS_DATETIME)}',
+        f'SUMMARY:{_escape_ics_text(title)}',
+        f'LOCATION:{_escape_ics_text(event_details["location"])}',
+    ]
 
-    e.name = event_details['title']
-    e.begin = event_details['datetime']
-    e.location = event_details['location']
-    
     # Add the URL to the description for easy access
     if event_details['link']:
-        e.description = f"For more details, visit: {event_details['link']}"
+        description = f"For more details, visit: {event_details['link']}"
+        lines.append(f'DESCRIPTION:{_escape_ics_text(description)}')
 
-    c.events.add(e)
+    lines += ['END:VEVENT', 'END:VCALENDAR']
+    content = ''.join(_fold_ics_line(line) + '\r\n' for line in lines)
 
     # Create a valid filename from the event title
-    # Remove invalid characters and limit length
-    filename_base = re.sub(r'[^\w\s-]', '', event_details['title']).strip()
-    filename_base = re.sub(r'[-\s]+', '-', filename_base)
-    filename = f"{filename_base[:50]}.ics"
-    
-    # Create an 'events' directory if it doesn't exist
-    if not os.path.exists('events'):
-        os.makedirs('events')
-        
-    filepath = os.path.join('events', filename)
+    # Remove invalid characters and limit length; the start time and UID keep
+    # every event in its own file, even when titles only differ in
+    # punctuation, letter case or past the first 50 characters
+    filename_base = _FILENAME_STRIP.sub('', title).strip()
+    filename_base = _FILENAME_DASH.sub('-', filename_base)
+    filename = f"{filename_base[:50]}-{begin:%Y%m%d-%H%M}-{uid[:8]}.ics"
+
+    filepath = os.path.join(EVENTS_DIR, filename)
+    new_bytes = content.encode('utf-8')
+
+    # Leave the file alone if a previous run already wrote the same event
+    try:
+        with open(filepath, 'rb') as f:
+            existing_bytes = f.read()
+        if _ICS_DTSTAMP_LINE.sub(b'', existing_bytes) == _ICS_DTSTAMP_LINE.sub(b'', new_bytes):
+            log.debug(f"Calendar file is up to date: {filepath}")
+            return 'unchanged'
+    except IOError:
+        pass # No existing file to compare against
 
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.writelines(c)
-        print(f"Successfully created calendar file: {filepath}")
+        # Write the whole calendar in a single call; binary mode keeps the
+        # CRLF line endings iCalendar requires on every platform.
+        with open(filepath, 'wb') as f:
+            f.write(new_bytes)
+        # One line per file is only shown at debug level; main() reports a summary
+        log.debug(f"Successfully created calendar file: {filepath}")
+        return 'written'
     except IOError as err:
-        print(f"Error writing file {filepath}: {err}")
+        log.error(f"Error writing file {filepath}: {err}")
+        return 'failed'
 
 
-def scrape_page(url):
-    """Scrapes a single page for event data."""
-    events_on_page = []
+def load_page_cache():
+    """Loads the page cache saved by the previous run, or an empty one."""
+    try:
+        with open(PAGE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_page_cache(page_cache):
+    """Saves the page cache so the next run can send conditional requests."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
+        with open(PAGE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(page_cache, f)
+    except IOError as err:
+        log.warning(f"Could not save page cache {PAGE_CACHE_FILE}: {err}")
+
+
+def _freshness_lifetime(headers):
+    """Returns how many seconds a response may be reused without revalidation."""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-cache' in cache_control:
+        return 0
+    match = _CACHE_CONTROL_MAX_AGE.search(cache_control)
+    lifetime = int(match.group(1)) if match else PAGE_CACHE_TTL
+
+    # Time the response already spent in a shared cache (e.g. a CDN) counts
+    # against its lifetime
+    try:
+        age = int(headers.get('Age', 0))
+    except ValueError:
+        age = 0
+    return max(lifetime - age, 0)
+
+
+def fetch_page(url, page_cache):
+    """Downloads a single page and returns its raw HTML bytes, or None on failure."""
+    cached = page_cache.get(url)
+    if cached and time.time() - cached.get('fetched_at', 0) < cached.get('max_age', 0):
+        # Fetched recently enough, skip the network entirely
+        return cached['html'].encode('utf-8', 'surrogateescape')
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        # Stream the body and close the response as soon as it is read so the
+        # connection goes straight back to the session's pool.
+        with SESSION.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304 and cached:
+                # Unchanged since the last run, reuse the stored HTML
+                cached['fetched_at'] = time.time()
+                if 'Cache-Control' in response.headers:
+                    cached['max_age'] = _freshness_lifetime(response.headers)
+                return cached['html'].encode('utf-8', 'surrogateescape')
+            response.raise_for_status()  # Raises an HTTPError for bad responses
+            html = response.content
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching page {url}: {e}")
-        return []
+        log.error(f"Error fetching page {url}: {e}")
+        return None
+
+    # Respect servers that ask for the page not to be stored
+    if 'no-store' in response.headers.get('Cache-Control', '').lower():
+        page_cache.pop(url, None)
+    else:
+        page_cache[url] = {
+            'fetched_at': time.time(),
+            'max_age': _freshness_lifetime(response.headers),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            # surrogateescape keeps the bytes intact even if they are not valid UTF-8
+            'html': html.decode('utf-8', 'surrogateescape'),
+        }
+    return html
+
+
+def parse_page(html, url):
+    """Parses a page's HTML into an element tree, or returns None if it has no document."""
+    try:
+        return lxml.html.fromstring(html, base_url=url)
+    except etree.ParserError as e:
+        # lxml refuses empty or whitespace-only bodies
+        log.warning(f"Could not parse page {url}: {e}")
+        return None
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+
+def scrape_page(tree):
+    """Scrapes a parsed page for event data.
+
+    The tree must be parsed with its page's base_url so relative links resolve.
+    """
+    events_on_page = []
 
     # Find all event entries on the page.
     # The structure has changed; each event is now within 'div' with class 'views-field-title'
-    event_containers = soup.find_all('div', class_='views-field-title')
+    event_containers = _XP_EVENT_CONTAINERS(tree)
 
     if not event_containers:
-        print("Could not find any event containers on the page. The website structure may have changed.")
+        log.warning("Could not find any event containers on the page. The website structure may have changed.")
         return []
 
-    # Define the timezone for the events, as the source HTML is misleading.
-    # Use 'America/Chicago' for Central Time Zone.
-    central_tz = pytz.timezone("America/Chicago")
-
     for item in event_containers:
         title = "No Title Found"
         link = ""
-        datetime_str = ""
         location = "No Location Found"
 
         # Find the title and the embedded link from the <a> tag
-        link_element = item.find('a')
-        if link_element:
+        link_elements = _XP_FIRST_LINK(item)
+        if link_elements:
+            link_element = link_elements[0]
             href = link_element.get('href', '')
-            # Construct full URL if href is relative
-            if href.startswith('/'):
-                link = "https://murphy.tulane.edu" + href
-            else:
-                link = href
+            # Construct full URL if href is relative, resolving it against
+            # the page it appears on like a browser would
+            link = urljoin(link_element.base_url, href) if href else ""
             
             # Title is inside a span with class 'font-bold' within the link
-            title_span = link_element.find('span', class_='font-bold')
-            if title_span:
-                title = title_span.text.strip()
+            title_spans = _XP_TITLE_SPAN(link_element)
+            if title_spans:
+                title = title_spans[0].text_content().strip()
             else: # Fallback if the inner span is not found
-                title = link_element.text.strip()
+                title = link_element.text_content().strip()
 
         # Find the date and time from the <time> tag's datetime attribute
-        time_tag = item.find('time')
-        if time_tag and time_tag.has_attr('datetime'):
-            datetime_str = time_tag['datetime']
+        datetime_str = _XP_DATETIME(item)
 
         # Find the location from the span with class 'location'
-        location_element = item.find('span', class_='location')
-        if location_element:
-            location = location_element.text.strip()
+        location_elements = _XP_LOCATION(item)
+        if location_elements:
+            location = location_elements[0].text_content().strip()
             
         # Parse the date string into a datetime object
         try:
@@ -108,10 +319,15 @@ def scrape_page(url):
 
                 # 1. Parse the string, ignoring the trailing 'Z' to create a naive datetime object.
                 naive_dt_str = datetime_str.rstrip('Zz')
-                parsed_naive_datetime = dateutil.parser.parse(naive_dt_str)
+                try:
+                    # The site emits plain ISO 8601, which fromisoformat handles quickly
+                    parsed_naive_datetime = datetime.fromisoformat(naive_dt_str)
+                except ValueError:
+                    # Fall back to the more lenient parser for anything unusual
+                    parsed_naive_datetime = dateutil.parser.parse(naive_dt_str)
 
-                # 2. Localize the naive datetime object to the Central timezone.
-                aware_datetime = central_tz.localize(parsed_naive_datetime)
+                # 2. Attach the Central timezone to the naive datetime object.
+                aware_datetime = parsed_naive_datetime.replace(tzinfo=CENTRAL_TZ)
 
                 events_on_page.append({
                     'title': title,
@@ -122,65 +338,94 @@ def scrape_page(url):
             else:
                 # If no datetime found, we can't create an event, so we'll note it and skip.
                 if title != "No Title Found": # Only warn if we actually found an event title
-                    print(f"Warning: Could not find date-time for event '{title}'")
+                    log.warning(f"Could not find date-time for event '{title}'")
 
         except (ValueError, TypeError):
-            print(f"Warning: Could not parse date-time string: '{datetime_str}' for event '{title}'")
+            log.warning(f"Could not parse date-time string: '{datetime_str}' for event '{title}'")
             
     return events_on_page
 
 
 def main():
     """Main function to crawl all pages and generate files."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     base_url = "https://murphy.tulane.edu/events/upcoming-events"
     all_events = []
+    page_cache = load_page_cache()
     
     # First, get the main page to identify pagination
-    try:
-        print(f"Fetching base page: {base_url}")
-        response = requests.get(base_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Could not fetch the main events page. Exiting. Error: {e}")
+    log.info(f"Fetching base page: {base_url}")
+    base_html = fetch_page(base_url, page_cache)
+    if base_html is None:
+        log.error("Could not fetch the main events page. Exiting.")
         return
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Parse the base page once and use it for both pagination and its events
+    base_tree = parse_page(base_html, base_url)
+    if base_tree is None:
+        log.error("Could not parse the main events page. Exiting.")
+        return
 
-    # Scrape the first page
-    print("Scraping page 1...")
-    all_events.extend(scrape_page(base_url))
-    
     # Find pagination links to discover all pages
-    # The pager links are in a 'li' with class 'pager__item'
-    page_links = set() # Use a set to avoid duplicate links
-    pager_items = soup.select('li.pager__item a')
-    for link in pager_items:
-        href = link.get('href')
-        if href and href.startswith('?page='):
-            full_url = base_url + href
-            page_links.add(full_url)
-            
-    # Scrape the rest of the pages
-    if page_links:
-        print(f"Found {len(page_links)} additional pages to scrape.")
-        for i, page_url in enumerate(sorted(list(page_links))):
-             print(f"Scraping page {i+2}/{len(page_links)+1}: {page_url}")
-             all_events.extend(scrape_page(page_url))
+    # The pager links are in a 'li' with class 'pager__item'.
+    # A dict keeps the pages in the order they are linked while dropping
+    # duplicates, e.g. the "next"/"last" links repeating a numbered page
+    page_urls = {}
+    for link in _XP_PAGER_LINKS(base_tree):
+        page_urls.setdefault(urljoin(base_url, link.get('href')), None)
+    page_urls = list(page_urls)
+
+    log.info(f"Scraping page 1/{len(page_urls)+1}: {base_url}")
+    all_events.extend(scrape_page(base_tree))
+
+    # Fetch the rest of the pages concurrently, then scrape them in page order
+    if page_urls:
+        log.info(f"Found {len(page_urls)} additional pages to scrape.")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pages_html = list(executor.map(lambda url: fetch_page(url, page_cache), page_urls))
+        for i, (page_url, html) in enumerate(zip(page_urls, pages_html)):
+            log.info(f"Scraping page {i+2}/{len(page_urls)+1}: {page_url}")
+            tree = parse_page(html, page_url) if html else None
+            if tree is not None:
+                all_events.extend(scrape_page(tree))
     else:
-        print("No additional pages found.")
+        log.info("No additional pages found.")
 
-    print(f"\nFound a total of {len(all_events)} events.")
+    # Drop pages that are no longer linked so the cache does not grow forever
+    requested_urls = {base_url, *page_urls}
+    page_cache = {url: entry for url, entry in page_cache.items() if url in requested_urls}
+    save_page_cache(page_cache)
+
+    log.info(f"\nFound a total of {len(all_events)} events.")
+
+    # Listing pages can repeat events at their boundaries; keep only the
+    # first occurrence of each so it is written to disk once
+    seen = set()
+    unique_events = []
+    for event in all_events:
+        key = (event['title'], event['datetime'])
+        if key not in seen:
+            seen.add(key)
+            unique_events.append(event)
+    if len(unique_events) < len(all_events):
+        log.info(f"Skipping {len(all_events) - len(unique_events)} duplicate events.")
+    all_events = unique_events
 
     if not all_events:
-        print("No events were found to process.")
+        log.info("No events were found to process.")
         return
         
     # Generate an .ics file for each event
-    print("\nGenerating calendar files...")
-    for event in all_events:
-        generate_ics_file(event)
+    log.info("\nGenerating calendar files...")
+    # Create the 'events' directory once, before any file is written
+    os.makedirs(EVENTS_DIR, exist_ok=True)
+    # Write the files from a thread pool so the blocking disk writes overlap
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = Counter(executor.map(generate_ics_file, all_events))
+    log.info(f"Wrote {results['written']} calendar files to '{EVENTS_DIR}', "
+             f"{results['unchanged']} were already up to date.")
         
-    print("\nProcessing complete.")
+    log.info("\nProcessing complete.")
 
 
 if __name__ == "__main__":